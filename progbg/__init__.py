@@ -18,4 +18,5 @@ from .core import Execution, ParseExecution
 
 from .globals import _sb_executions, _sb_registered_benchmarks
 from .globals import _sb_registered_backend, _sb_graphs, _sb_figures
+from .globals import _sb_registered_classes
 from .globals import DEFAULT_SIZE
@@ -15,7 +15,9 @@ import sqlite3
 
 import types
 import subprocess
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import List, Dict, Tuple
 from pprint import pformat
 
 import matplotlib.pyplot as plt
@@ -29,6 +31,7 @@ from .util import Backend, Variables, error, Metrics
 from .style import get_style, set_style
 
 from .globals import _sb_registered_benchmarks, _sb_registered_backend
+from .globals import _sb_registered_classes
 from .globals import _sb_executions, _sb_graphs, _sb_rnames
 from .globals import _sb_figures, GRAPHS_DIR
 from .globals import _EDIT_GLOBAL_TABLE
@@ -42,39 +45,38 @@ def _retrieve_named_backends(back_obj):
     named = []
     for backend in back_obj.backends:
         cls = _sb_registered_backend[backend]
-        required_init = inspect.getfullargspec(cls.init).args
-        required_uninit = inspect.getfullargspec(cls.uninit).args
-        named.extend(required_init + required_uninit)
+        named.extend(_arg_names(cls.init) + _arg_names(cls.uninit))
 
     return named
 
 
 def _retrieve_named_benchmarks(name):
     cls = _sb_registered_benchmarks[name]
-    required_run = inspect.getfullargspec(cls.run).args[2:]
-
-    return required_run
+    return list(_arg_names(cls.run)[2:])
 
 
 def _retrieve_backends(back_obj):
     return [_sb_registered_backend[back] for back in back_obj.backends]
 
 
+@lru_cache(maxsize=None)
+def _sh_script(file_path: str) -> bytes:
+    """Contents of a shell backend or benchmark script, read once per plan run"""
+    with open(file_path, "r") as script:
+        return str.encode(script.read() + "\n")
+
+
 def registerbenchmark_sh(name: str, file_path: str):
     custom_backend = type(name, (object,), {})
 
     @staticmethod
     def run(backend, out_file):
-        out = open(out_file, "w")
-        shell = subprocess.Popen("sh", stdin=subprocess.PIPE, stdout=out)
-        script = open(file_path, "r").read()
-        script += "\n"
-        shell.stdin.write(str.encode(script))
-        script = open(file_path, "r").read()
-        run_str = "run\n".format(i)
-        shell.stdin.write(str.encode(run_str))
-        shell.stdin.close()
-        shell.wait()
+        with open(out_file, "w") as out:
+            shell = subprocess.Popen("sh", stdin=subprocess.PIPE, stdout=out)
+            shell.stdin.write(_sh_script(file_path))
+            shell.stdin.write(str.encode("run\n"))
+            shell.stdin.close()
+            shell.wait()
 
     custom_backend.run = run
     registerbenchmark(custom_backend)
@@ -86,9 +88,7 @@ def registerbackend_sh(name: str, file_path: str):
     @staticmethod
     def init():
         shell = subprocess.Popen("sh", stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-        script = open(file_path, "r").read()
-        script += "\n"
-        shell.stdin.write(str.encode(script))
+        shell.stdin.write(_sh_script(file_path))
         shell.stdin.write(str.encode("init > /dev/null\n"))
         shell.stdin.write(str.encode("env\n"))
         shell.stdin.close()
@@ -107,9 +107,7 @@ def registerbackend_sh(name: str, file_path: str):
         shell = subprocess.Popen(
             "sh", stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=custom_backend.env
         )
-        script = open(file_path, "r").read()
-        script += "\n"
-        shell.stdin.write(str.encode(script))
+        shell.stdin.write(_sh_script(file_path))
         shell.stdin.write(str.encode("uninit\n"))
         shell.stdin.close()
         shell.wait()
@@ -135,11 +133,43 @@ class NullBackend:
 __pdoc__["NullBackend"] = False
 
 
+def _available_memory() -> float:
+    """Fraction of system memory available, 1.0 when it cannot be determined"""
+    try:
+        info = {}
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                name, _, val = line.partition(":")
+                info[name] = int(val.split()[0])
+        return info["MemAvailable"] / info["MemTotal"]
+    except (OSError, KeyError, ValueError, IndexError, ZeroDivisionError):
+        return 1.0
+
+
+def _auto_workers() -> int:
+    """Concurrent benchmark runs to use for workers="auto"
+
+    Memory is checked before each backend configuration is run, halving the
+    number of runs at each tier of memory pressure.
+    """
+    available = _available_memory()
+    if available >= 0.5:
+        workers = 8
+    elif available >= 0.25:
+        workers = 4
+    elif available >= 0.1:
+        workers = 2
+    else:
+        workers = 1
+    return min(workers, os.cpu_count() or 1)
+
+
 class Execution:
     """Execution class, see plan_execution documentation"""
 
-    def __init__(self, benchmark, backends: List, parser, out: str):
+    def __init__(self, benchmark, backends: List, parser, out: str, workers=1):
         self.bench = benchmark
+        self.workers = workers
 
         if backends:
             self.backends = backends
@@ -149,14 +179,19 @@ class Execution:
         self.out = out
         self.parser = parser
         self._cached = None
+        self._varying = None
         self.name = (
             ",".join([back.name for back in self.backends]) + "-" + self.bench.name
         )
 
     def varying(self):
-        return [x[0] for x in self.bench.variables.var] + [
-            x[0] for back in self.backends for x in back.variables.var
-        ]
+        # The benchmark and backends are fixed once planned, so the names are
+        # only gathered on the first call
+        if self._varying is None:
+            self._varying = [x[0] for x in self.bench.variables.var] + [
+                x[0] for back in self.backends for x in back.variables.var
+            ]
+        return list(self._varying)
 
     def print(self, string):
         """Pretty printer for execution"""
@@ -277,14 +312,11 @@ class Execution:
                     exit(0)
 
     def _merged_args(self, back_vars):
+        # Benchmark arguments are walked once per backend argument set so they are
+        # kept as a list, backend arguments are only walked once
         benchmark = self.bench.variables.produce_args()
-        backend = back_vars.produce_args()
-        args = []
-        for back in backend:
-            arg = dict(benchmark=benchmark, backend=back)
-            args.append(arg)
-
-        return args
+        for back in back_vars.iter_args():
+            yield dict(benchmark=benchmark, backend=back)
 
     def parse(self):
         # Pretty messy having to do this twice but need to retrieve proper data
@@ -353,11 +385,30 @@ class Execution:
                 back_args = arg_set["backend"]
                 back.__class__.start(**back_args)
                 # Go through every benchmark argument listing
-                for ba in bench_args:
-                    for iteration in range(0, self.bench.iterations):
-                        out_file = os.path.abspath(
-                            self.out_file(back, back_args, ba, iteration)
-                        )
+                runs = (
+                    (ba, os.path.abspath(self.out_file(back, back_args, ba, iteration)))
+                    for ba in bench_args
+                    for iteration in range(0, self.bench.iterations)
+                )
+                workers = _auto_workers() if self.workers == "auto" else self.workers
+                if workers > 1:
+                    run = self.bench.__class__.run
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        # Runs are only submitted as earlier ones finish, so at most
+                        # `workers` of them are pending at once
+                        pending = set()
+                        for ba, out_file in runs:
+                            if len(pending) >= workers:
+                                done, pending = wait(
+                                    pending, return_when=FIRST_COMPLETED
+                                )
+                                for future in done:
+                                    future.result()
+                            pending.add(pool.submit(run, back.name, out_file, **ba))
+                        for future in pending:
+                            future.result()
+                else:
+                    for ba, out_file in runs:
                         self.bench.__class__.run(back.name, out_file, **ba)
                 back.__class__.uninit()
 
@@ -413,24 +464,20 @@ class ParseExecution:
     def param_exists(self, param):
         return True
 
-    def _parse_file(self, metrics, path: str, iter):
-        self._func(metrics, path)
-        if self.out is not None:
-            metrics.to_file(self.out + "/" + self.name)
-
     def parse(self):
         if self._cached:
             return
 
         metrics = Metrics()
         if os.path.isdir(self._data):
-            i = 0
             for file in os.listdir(self._data):
-                path = os.path.join(self._data, file)
-                self._parse_file(metrics, path, i)
-                i += 1
+                self._func(metrics, os.path.join(self._data, file))
         else:
-            self._parse_file(metrics, self._data, 0)
+            self._func(metrics, self._data)
+
+        # Every file adds to the same metrics, so they are written out once at the end
+        if self.out is not None:
+            metrics.to_file(self.out + "/" + self.name)
 
         self._cached = [metrics]
 
@@ -470,6 +517,7 @@ def plan_parse(name: str, file: str, parse_file_func, out_dir: str = None):
     return _sb_executions[-1]
 
 
+@lru_cache(maxsize=None)
 def compose_backends(*backends):
     """Composes registered backend classes into anonymous class
 
@@ -490,11 +538,14 @@ def compose_backends(*backends):
         >>>     ...
         >>>
         >>> composition = compose_backends(Backend1, Backend2)
+
+        Composing the same backends again returns the same class.
     """
+    name = "-".join([b.__name__ for b in backends])
 
     def construct(self, consts={}, vars=[]):
         self.variables = Variables(consts, vars)
-        self.name = "-".join([b.__name__ for b in backends])
+        self.name = name
 
     def start(**kwargs):
         for backend in backends:
@@ -511,7 +562,9 @@ def compose_backends(*backends):
     return composition
 
 
-def plan_execution(runner, backends: List = None, parser=None, out: str = None) -> None:
+def plan_execution(
+    runner, backends: List = None, parser=None, out: str = None, workers=1
+) -> None:
     """Plan an execution
 
     Definition of an execution of a workload/benchmark and backends you wish to run the workload
@@ -522,6 +575,10 @@ def plan_execution(runner, backends: List = None, parser=None, out: str = None)
         backends (List): List of Constructed backends to run on
         parser (Function): Parsing function which takes a metrics, and out_file as args.
         out (str): Directory in which to place parsed output.
+        workers (int, str): Number of benchmark runs to have in flight at once for each
+            backend configuration (default 1). Only raise this for benchmarks whose
+            runs do not interfere with each other's measurements. "auto" picks a
+            count from the free memory of the machine.
 
     Returns:
         Execution object
@@ -568,10 +625,17 @@ def plan_execution(runner, backends: List = None, parser=None, out: str = None)
 
     """
 
+    if workers != "auto" and (
+        not isinstance(workers, int) or isinstance(workers, bool) or workers < 1
+    ):
+        raise ValueError(
+            'workers must be a positive int or "auto", got {!r}'.format(workers)
+        )
+
     # We have to fix up the variables, we do this so the user doesnt
     # have to re-input variables twice. Parser also needs to know
     # variable names to create the object
-    _sb_executions.append(Execution(runner, backends, parser, out))
+    _sb_executions.append(Execution(runner, backends, parser, out, workers))
     return _sb_executions[-1]
 
 
@@ -609,8 +673,14 @@ def _is_static(func):
     return isinstance(func, types.FunctionType)
 
 
+@lru_cache(maxsize=None)
+def _arg_names(func) -> Tuple[str]:
+    """Argument names of a registered function, inspected once per function"""
+    return tuple(inspect.getfullargspec(func).args)
+
+
 def _has_required_args(func):
-    return len(inspect.getfullargspec(func).args) >= 2
+    return len(_arg_names(func)) >= 2
 
 
 _names_used = []
@@ -618,9 +688,9 @@ _names_used = []
 
 def _check_names(cls, func, is_run=False):
     if is_run:
-        args = inspect.getfullargspec(func).args[2:]
+        args = _arg_names(func)[2:]
     else:
-        args = inspect.getfullargspec(func).args
+        args = _arg_names(func)
     for name in args:
         # if name in _names_used:
         # error("Class '{}'-> function '{}' uses already defined argument name: {}".format(
@@ -629,6 +699,23 @@ def _check_names(cls, func, is_run=False):
         _names_used.append(name)
 
 
+def _registered(cls, registry):
+    """Wrapper registered for cls, errors if another class took its name"""
+    qualified = "{}.{}".format(cls.__module__, cls.__qualname__)
+    if qualified in _sb_registered_classes:
+        return _sb_registered_classes[qualified]
+
+    other = registry.get(cls.__name__.lower())
+    if other is not None:
+        error(
+            "Name '{}' is already registered by {}.{}".format(
+                cls.__name__, other.__module__, other.__qualname__
+            )
+        )
+
+    return None
+
+
 def registerbenchmark(cls):
     """Register a benchmark with ProgBG
 
@@ -638,6 +725,11 @@ def registerbenchmark(cls):
     Returns:
         Wrapped class object
     """
+    # A plan imported twice defines its classes again, they keep the first wrapper
+    existing = _registered(cls, _sb_registered_benchmarks)
+    if existing is not None:
+        return existing
+
     if not hasattr(cls, "run"):
         error("Benchmark requires the run function: {}".format(cls.__name__))
 
@@ -654,16 +746,13 @@ def registerbenchmark(cls):
     cls.__init__ = construct
 
     _sb_registered_benchmarks[cls.__name__.lower()] = cls
+    _sb_registered_classes["{}.{}".format(cls.__module__, cls.__qualname__)] = cls
 
     return cls
 
 
-def _get_args(spec, **kwargs):
-    args = dict()
-    for i, k in enumerate(spec.args):
-        if k in kwargs:
-            args[k] = kwargs[k]
-    return args
+def _get_args(names, **kwargs):
+    return {k: kwargs[k] for k in names if k in kwargs}
 
 
 def registerbackend(cls):
@@ -675,6 +764,11 @@ def registerbackend(cls):
     Returns:
         Wrapped class object
     """
+    # Wrapping start again would hide its arguments behind **kwargs
+    existing = _registered(cls, _sb_registered_backend)
+    if existing is not None:
+        return existing
+
     if not hasattr(cls, "start"):
         error(
             "The following Backend is missing the 'start' function: {}".format(
@@ -696,17 +790,18 @@ def registerbackend(cls):
         self.vars = Variables(consts, vars)
         self.name = cls.__name__
 
-    spec = inspect.getfullargspec(cls.start)
+    names = _arg_names(cls.start)
     old = cls.start
 
     def wrapped_start(**kwargs):
-        args = _get_args(spec, **kwargs)
+        args = _get_args(names, **kwargs)
         return old(**args)
 
     cls.__init__ = construct
     cls.start = wrapped_start
 
     _sb_registered_backend[cls.__name__.lower()] = cls
+    _sb_registered_classes["{}.{}".format(cls.__module__, cls.__qualname__)] = cls
 
     return cls
 
@@ -822,6 +917,8 @@ class Figure:
         if not out.endswith(".svg"):
             out = ".".join(out.split(".")[:-1]) + ".svg"
             plt.savefig(out)
+        # pyplot keeps every figure alive until closed
+        plt.close(fig)
 
 
 __pdoc__["Figure"] = False
@@ -911,6 +1008,7 @@ def execute_plan(plan: str, args):
         plt.savefig(out)
         out = os.path.join(GRAPHS_DIR, graph.html_out)
         plt.savefig(out)
+        plt.close(fig)
 
     for fig in _sb_figures:
         fig.create()
@@ -1,7 +1,12 @@
 """Common utility formatters used by Graphs"""
 
+import math
+
 from matplotlib.ticker import FuncFormatter
 
+_SUFFIXES = ("", "k", "M", "B", "T", "Q")
+_SCALES = tuple(1000.0**i for i in range(len(_SUFFIXES)))
+
 
 def set_yrange(min=None, max=None):
     def tmp(fig, axes):
@@ -44,15 +49,19 @@ def _axis_formatter(type, label="", tf=None):
     )
 
     def tmp_num(tf):
+        to_from = units[tf[0]] / units[tf[1]] if tf else 1.0
+
         def number_formatter(number, pos=0):
-            if tf:
-                to_from = units[tf[0]] / units[tf[1]]
-                number = to_from * number
+            number = to_from * number
+            # Pick the suffix from the number's order of magnitude rather than
+            # dividing down by 1000 until it fits
             magnitude = 0
-            while abs(number) >= 1000:
-                magnitude += 1
-                number /= 1000
-            return "%d%s" % (number, ["", "k", "M", "B", "T", "Q"][magnitude])
+            if abs(number) >= 1000:
+                magnitude = min(int(math.log10(abs(number)) // 3), len(_SUFFIXES) - 1)
+                # log10 can round up just below a power of 1000
+                if abs(number) < _SCALES[magnitude]:
+                    magnitude -= 1
+            return "%d%s" % (number / _SCALES[magnitude], _SUFFIXES[magnitude])
 
         return number_formatter
 
@@ -2,6 +2,7 @@
 
 _sb_registered_benchmarks = {}
 _sb_registered_backend = {}
+_sb_registered_classes = {}
 _sb_executions = []
 _sb_graphs = []
 _sb_figures = []
@@ -21,6 +22,7 @@ GRAPHS_DIR = "graphs"
 _EDIT_GLOBAL_TABLE = {
     "_sb_registered_benchmarks": _sb_registered_benchmarks,
     "_sb_registered_backend": _sb_registered_backend,
+    "_sb_registered_classes": _sb_registered_classes,
     "_sb_executions": _sb_executions,
     "_sb_graphs": _sb_graphs,
     "_sb_figures": _sb_figures,
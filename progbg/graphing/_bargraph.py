@@ -9,13 +9,21 @@ import numpy as np
 
 from cycler import cycler, Cycler
 
-from ._util import filter, axis_kwargs
+from ._util import filter, columns, axis_kwargs
 from ._graph import Graph, GraphObject
 
 from ..globals import _sb_executions
 from ..util import Backend, retrieve_obj, error
 from ..util import ExecutionStub
-from ..style import get_style, set_style
+from ..style import get_style, set_style, get_style_cycler
+
+
+def _split_std(columns):
+    """Split columns into value columns and their "_std" columns in one pass"""
+    cols, cols_std = [], []
+    for c in columns:
+        (cols_std if isinstance(c, str) and c.endswith("_std") else cols).append(c)
+    return cols, cols_std
 
 
 class Bar(GraphObject):
@@ -51,6 +59,8 @@ class Bar(GraphObject):
             d = dict()
             for i, x in enumerate(self.composed):
                 d[x] = wl[i]
+                # Constants have no spread
+                d[x + "_std"] = 0.0
             wl = ExecutionStub(**d)
         self.workload = wl
         self.label = label
@@ -60,13 +70,15 @@ class Bar(GraphObject):
             self.label = [""]
 
     def get_data(self, restrict_on):
-        d = filter(self.workload._cached, restrict_on)[0].get_stats()
+        # get_stats() hands back the metrics' cached dict, so it must not be mutated here
+        soa = columns(self.workload)
+        d = soa["_metrics"][np.flatnonzero(filter(soa, restrict_on))[0]].get_stats()
         composed = []
         for c in self.composed:
             composed.append(c)
             composed.append(c + "_std")
-        label = self.label
-        return pd.DataFrame({c: d[c] for c in composed}, index=self.label).T
+        vals = [d[c] for c in composed]
+        return pd.DataFrame({label: vals for label in self.label}, index=composed)
 
 
 class BarGroup(GraphObject):
@@ -90,13 +102,15 @@ class BarGroup(GraphObject):
         self.wls = executions
         self.cat = cat
         self.label = label
+        # Bars are built once so constant values become a stub execution, and its
+        # columnar view, a single time rather than on every draw
+        self._bars = [
+            Bar([w] if isinstance(w, (int, float)) else w, [cat], [label[i]])
+            for i, w in enumerate(executions)
+        ]
 
     def get_data(self, restrict_on):
-        bars = []
-        for i, w in enumerate(self.wls):
-            bars.append(Bar(w, [self.cat], [self.label[i]]))
-        dfs = [b.get_data(restrict_on).T for b in bars]
-        return dfs
+        return [b.get_data(restrict_on).T for b in self._bars]
 
     def bars(self):
         bars = []
@@ -183,8 +197,7 @@ class BarGraph(Graph):
             # Retrieve top level labels
             data = [pd.concat(x) for x in data]
             data = pd.concat(data, axis=1)
-            cols = [c for c in data.columns if c[-4:] != "_std"]
-            cols_std = [c for c in data.columns if len(c) > 4 and c[-4:] == "_std"]
+            cols, cols_std = _split_std(data.columns)
             df = data[cols].T
             std = data[cols_std]
             std.columns = [x[:-4] for x in std.columns]
@@ -194,8 +207,17 @@ class BarGraph(Graph):
                 ax.set_yscale("log")
         else:
             data = pd.concat(data, axis=1).T
-            cols = [c for c in data.columns if c[-4:] != "_std"]
-            cols_std = [c for c in data.columns if len(c) > 4 and c[-4:] == "_std"]
+            cols, cols_std = _split_std(data.columns)
             df = data[cols]
             std = data[cols_std].T
-            df.plot(rot=-90, kind="bar", stacked=True, ax=ax)
+            # Stack the bars manually so a single bottom buffer is reused per level
+            ticks = np.arange(len(df.index))
+            bottom = np.zeros(len(df.index), dtype=np.float64)
+            style = get_style_cycler()()
+            for col in df.columns:
+                arr = df[col].to_numpy(dtype=np.float64, na_value=0.0)
+                ax.bar(ticks, arr, self.width, bottom=bottom, label=col, **next(style))
+                bottom += arr
+            ax.set_xticks(ticks)
+            ax.set_xticklabels(df.index, rotation=-90)
+            ax.legend()
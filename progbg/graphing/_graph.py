@@ -3,9 +3,12 @@ import pandas as pd
 
 from cycler import Cycler
 from ..style import get_style, set_style
+from ._util import Restriction
 
 
 class GraphObject(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def get_data(self):
         pass
@@ -23,6 +26,10 @@ class Graph(ABC):
         for p, default in default_options.items():
             setattr(self, p, kwargs.get(p, default))
 
+        # The restriction's hashable key is built once here and reused by every mask
+        # and series lookup
+        self._restrict_on = Restriction(kwargs.get("restrict_on", self._restrict_on))
+
     def get_data(self, restrict_on):
         return [y.get_data(restrict_on) for y in self.workloads]
 
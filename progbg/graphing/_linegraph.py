@@ -1,4 +1,6 @@
 from typing import List, Dict
+from collections import namedtuple
+from itertools import islice
 from pprint import pformat
 from enum import Enum
 import pandas as pd
@@ -10,13 +12,16 @@ import numpy as np
 from cycler import cycler, Cycler
 
 from ._graph import Graph, GraphObject
-from ._util import filter
+from ._util import filter, columns, column, group_mean, restrict_key
 
 from ..globals import _sb_executions
 from ..util import Backend, retrieve_obj, error
 from ..util import ExecutionStub
 from ..style import get_style, set_style, get_style_cycler
 
+LineData = namedtuple("LineData", ["label", "x", "y", "y_std"])
+"""Series of a single line: its label, x values, and the mean and std at each x"""
+
 
 class ConstLine(GraphObject):
     """Const Line Object
@@ -28,6 +33,8 @@ class ConstLine(GraphObject):
         index: Label used for the value's index. Used when comparing against other lines
     """
 
+    __slots__ = ("label", "value", "index", "style")
+
     def __init__(self, value, label, index, style=":"):
         self.label = label
         self.value = value
@@ -63,6 +70,8 @@ class Line(GraphObject):
         >>> l2 = Line([e1, e2, e3], "data1", x=[0, 1, 2])
     """
 
+    __slots__ = ("label", "value", "workload", "x", "style")
+
     def __init__(self, execution, value: str, x=None, label: str = None, style="--"):
         if label:
             self.label = label
@@ -85,22 +94,44 @@ class Line(GraphObject):
             ), "When x is a list, workload list length must equal x list length"
 
     def get_data(self, restrict_on, iter=None):
-        d = {self.label: [], self.label + "_std": []}
+        # get_stats() hands back the metrics' cached dict, so it must not be mutated here
         if isinstance(self.workload, list):
-            for x in self.workload:
-                d[self.label].append(x._cached[0].get_stats()[self.value])
-                d[self.label + "_std"].append(
-                    x._cached[0].get_stats()[self.value + "_std"]
-                )
-
-            return pd.DataFrame(d, index=self.x)
+            stats = [x._cached[0].get_stats() for x in self.workload]
+            return LineData(
+                self.label,
+                np.asarray(self.x),
+                np.array([d[self.value] for d in stats], dtype=np.float64),
+                np.array([d[self.value + "_std"] for d in stats], dtype=np.float64),
+            )
         else:
-            metrics = filter(self.workload._cached, restrict_on)
-            dicts = [d.get_stats() for d in metrics]
-            df = pd.DataFrame(dicts)
-            df = df.groupby([self.x])
-
-            return pd.DataFrame(df.mean()[[self.value, self.value + "_std"]])
+            return self._series(columns(self.workload), restrict_on)
+
+    def _series(self, soa, restrict_on):
+        """Average the restricted series of a columnar view over each x value
+
+        Series are cached on the view, so lines of the same value drawn by several
+        graphs or figures are only aggregated once.
+        """
+        key = restrict_key(restrict_on)
+        if key is not None:
+            key = (self.x, self.value, key)
+        series = soa["_series"].get(key) if key is not None else None
+        if series is None:
+            mask = filter(soa, restrict_on)
+            # Hash the x values into groups in one pass, only distinct values get sorted
+            codes, xs = pd.factorize(
+                column(soa, self.x)[mask], sort=True, use_na_sentinel=False
+            )
+            vals, stds = group_mean(
+                codes.astype(np.int64, copy=False),
+                len(xs),
+                column(soa, self.value)[mask],
+                column(soa, self.value + "_std")[mask],
+            )
+            series = (xs, vals, stds)
+            if key is not None:
+                soa["_series"][key] = series
+        return LineData(self.label, *series)
 
 
 class LineGraph(Graph):
@@ -112,6 +143,9 @@ class LineGraph(Graph):
         style (str, cycler): Style string for progbg styles or a cycler object to dictate custom style of lines
         formatter (Function, optional): Formatter to be used on the graph once the graph is complete
         out (str, optional): Optional name for file the user wishes to save the graph too.
+        std (bool, optional): Show the standard deviation of each line (default False)
+        std_style (str, optional): How standard deviation is drawn, "bar" for error bars (default)
+            or "band" for a shaded band around each line, which is much cheaper for long lines
         kwargs (optional): Passed to matplotlib `Axes.plot` function or optional named params below.
 
     Types of Line Graphs:
@@ -151,6 +185,7 @@ class LineGraph(Graph):
 
         default_options = dict(
             std=False,
+            std_style="bar",
             group_labels=[],
             type="default",
             log=False,
@@ -171,35 +206,26 @@ class LineGraph(Graph):
         self.html_out = ".".join(self.out.split(".")[:-1]) + ".svg"
 
     def _graph(self, ax, data):
-        # Hack for dealing with const lines.
+        # Const lines span the x values of the first line
         consts = [x.get_data(self._restrict_on) for x in self.consts]
-        vals = [x for x in data[0].T.columns]
-        styles = [x.style for x in self.workloads]
-        styles_consts = [x.style for x in self.consts]
-
-        # Combine data
-        data = pd.concat(data, axis=1)
-        consts = [pd.DataFrame({c[0]: [c[1]] * len(vals)}, index=vals) for c in consts]
-        if len(consts):
-            consts = pd.concat(consts, axis=1)
-
-        # Pull out the standard deviation and such
-        cols = [c for c in data.columns if c[-4:] != "_std"]
-        cols_std = [c for c in data.columns if len(c) > 4 and c[-4:] == "_std"]
-        d = data[cols]
-        std = data[cols_std]
-        std.columns = [x[:-4] for x in std.columns]
-        y = [x for x in d.T.columns]
-
-        # It seems like styles is not respected setting them so we will manually do them
-        style = iter(get_style_cycler())
-        for i, x in enumerate(d.columns):
-            tmp = next(style)
-            if self.std:
-                ax.errorbar(y, d[x].tolist(), yerr=std[x], **tmp)
+        xs = data[0].x
+
+        # It seems like styles is not respected setting them so we will manually do them.
+        # The cycler repeats once exhausted, so there is a style for every line.
+        styles = list(islice(get_style_cycler()(), len(data) + len(consts)))
+        for line, ld, tmp in zip(self.workloads, data, styles):
+            if self.std and self.std_style == "band":
+                ax.plot(ld.x, ld.y, line.style, label=ld.label, **tmp)
+                ax.fill_between(
+                    ld.x,
+                    ld.y - ld.y_std,
+                    ld.y + ld.y_std,
+                    alpha=0.2,
+                    color=tmp.get("color"),
+                )
+            elif self.std:
+                ax.errorbar(ld.x, ld.y, yerr=ld.y_std, label=ld.label, **tmp)
             else:
-                ax.plot(y, d[x].tolist(), styles[i], **tmp)
-        if len(consts):
-            for i, x in enumerate(consts.columns):
-                tmp = next(style)
-                ax.plot(y, consts[x].tolist(), **tmp)
+                ax.plot(ld.x, ld.y, line.style, label=ld.label, **tmp)
+        for (label, val), tmp in zip(consts, styles[len(data) :]):
+            ax.plot(xs, np.full(len(xs), val, dtype=np.float64), label=label, **tmp)
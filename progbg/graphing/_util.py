@@ -4,8 +4,6 @@ from enum import Enum
 import pandas as pd
 import os
 
-# import sqlite3
-
 import matplotlib as mpl
 import numpy as np
 
@@ -17,133 +15,164 @@ from ..util import ExecutionStub
 from ..style import get_style, set_style
 
 
-def _is_good(benchmark, restriction):
-    for key, val in restriction.items():
-        if key not in benchmark:
-            continue
-        if str(benchmark[key]) != str(val):
-            return False
-
-    return True
-
-
-def _retrieve_data_files(execution, restriction):
-    files = [os.path.join(execution.out, path) for path in os.listdir(execution.out)]
-    benchmarks = []
-    for file in files:
-        try:
-            obj = retrieve_obj(file)
-            if _is_good(obj, restriction):
-                benchmarks.append(obj)
-        except:
-            continue
-    if len(benchmarks) == 0:
-        error(
-            "No output after restriction are not filtering everything out? {} - {}".format(
-                pformat(restriction), execution.name
-            )
-        )
+def _calculate_ticks(group_len: int, width: float):
+    """Given some group size, and width calculate
+    where ticks would occur.
 
-    return benchmarks
+    Meant for bar graphs
+    """
+    start = -((group_len - 1) / 2.0) * width
+    return (np.arange(group_len) * width + start).tolist()
 
 
-def _retrieve_data_db(execution, restriction):
-    conn = sqlite3.connect(execution.out)
-    if execution.backends:
-        sq_friendly = Backend.out_to_sql(restriction["_backend"])
-        tablename = "{}__{}__{}".format(
-            execution.name, execution.bench.name, sq_friendly
-        )
-        if tablename not in execution.tables:
-            raise Exception("Table not present, this should not occur")
-    else:
-        tablename = "{}__{}".format(execution.name, execution.bench.name)
+def group_mean(codes, n_groups: int, *columns):
+    """Mean of each column over the groups given by integer codes
 
-    new_restrict = {
-        k: restriction[k] for k in execution.tables[tablename] if k in restriction
-    }
-    c = conn.cursor()
-    # Eliminate quotes.  Deciding whether to default include them for better SQL or default remove
-    # for readability
-    new_restrict = {
-        k: restriction[k] for k in execution.tables[tablename] if k in restriction
-    }
+    Codes are expected to be an int64 array of group indices (as returned by
+    pd.factorize), columns are float arrays of the same length.
+    The means are returned as float64.
+    """
+    counts = np.bincount(codes, minlength=n_groups)
+    return [
+        np.bincount(codes, weights=col, minlength=n_groups) / counts for col in columns
+    ]
 
-    # This feels not good to use -- have to find a nice abstraction for converting between
-    # SQL Friendly names and names that feel good for the user, should not be hard coded
-    if execution.backends:
-        new_restrict["_backend"] = sq_friendly
 
-    clauses = ["({}='{}')".format(k, v) for k, v in new_restrict.items()]
-    full = " AND ".join(clauses)
-    quotes = ["{}".format(val) for val in execution.tables[tablename]]
-    exec_str = "SELECT {} FROM {} WHERE ({})".format(",".join(quotes), tablename, full)
-    c.execute(exec_str)
-    data = c.fetchall()
-    if not len(data):
-        raise Exception("Restriction too fine - no data found")
+def axis_kwargs(ax, kwargs):
+    if "title" in kwargs:
+        ax.set_title(kwargs.get("title"))
 
-    if len(data[0]) != len(execution.tables[tablename]):
-        raise Exception("Data types not matching with sqldb")
 
-    benchmarks = [dict(zip(execution.tables[tablename], vals)) for vals in data]
-    c.close()
-    conn.close()
+_MISSING = object()
 
-    return benchmarks
 
+def _as_column(vals: List):
+    try:
+        col = np.asarray(vals)
+        if col.ndim == 1 and col.dtype.kind in "biuf":
+            return col
+    except ValueError:
+        pass
 
-def _retrieve_relavent_data(workloads: str, restriction: Dict):
-    """
-    Grab the workloads string, and retrictions and filter out the data within the specified out
-    backend, this can either be a file or an sqllite3 db.
+    # Keep non-numeric values as python objects so comparisons behave as they
+    # would against the original metric values
+    col = np.empty(len(vals), dtype=object)
+    for i, val in enumerate(vals):
+        col[i] = val
+    return col
+
+
+def _build_soa(metrics: List) -> Dict:
+    """Convert a list of metrics into a column per stat key
+
+    Stats produced through `add_metric` are kept within "_stats", constants
+    (what graphs restrict on) are kept within "_restrict". Keys missing from
+    a metric are filled with a sentinel that never compares equal.
+
+    Float stat columns are float64, matching the stats of the metrics, and are
+    sized up front and filled directly, metrics missing a stat hold NaN.
+    Constants keep their natural dtype as they are compared exactly.
     """
-    final_args = dict()
-    for work in workloads:
-        restrict = dict(restriction)
-        path = work.split(":")
-        restrict["_execution_name"] = path[0]
-        if len(path) == 2:
-            restrict["_backend"] = Backend.user_to_out(path[1])
-        execution = _sb_executions[path[0]]
-        if execution.is_sql_backed():
-            benchmark = _retrieve_data_db(execution, restrict)
+    stats = [m.get_stats() for m in metrics]
+    n = len(stats)
+    consts = set(k for m in metrics for k in m._consts)
+    keys = dict.fromkeys(k for s in stats for k in s)
+    soa = {
+        "_metrics": metrics,
+        "_n": n,
+        "_stats": {},
+        "_restrict": {},
+        "_masks": {},
+        "_series": {},
+    }
+    for key in keys:
+        if key in consts:
+            soa["_restrict"][key] = _as_column([s.get(key, _MISSING) for s in stats])
         else:
-            benchmark = _retrieve_data_files(execution, restrict)
+            # Anything that is not a constant is a mean or std from add_metric
+            soa["_stats"][key] = np.fromiter(
+                (s.get(key, np.nan) for s in stats), dtype=np.float64, count=n
+            )
 
-        final_args[work] = benchmark
+    return soa
 
-    return final_args
 
+def columns(execution) -> Dict:
+    """Retrieve the columnar view of an execution's parsed metrics
 
-def _calculate_ticks(group_len: int, width: float):
-    """Given some group size, and width calculate
-    where ticks would occur.
+    The view is built once and cached on the execution until its parsed
+    metrics are replaced.
+    """
+    soa = getattr(execution, "_soa", None)
+    if soa is None or soa["_metrics"] is not execution._cached:
+        soa = _build_soa(execution._cached)
+        execution._soa = soa
+    return soa
 
-    Meant for bar graphs
+
+def column(soa: Dict, key: str):
+    """Retrieve a single column from a columnar view"""
+    if key in soa["_stats"]:
+        return soa["_stats"][key]
+    return soa["_restrict"][key]
+
+
+_CACHE_RESTRICTED = not os.environ.get("PROGBG_NO_GRAPH_CACHE")
+"""Masks and series are cached per restriction unless PROGBG_NO_GRAPH_CACHE is set,
+which saves memory for plans where every graph restricts differently"""
+
+
+def _items_key(restrict_dict: Dict):
+    try:
+        return frozenset(restrict_dict.items())
+    except TypeError:
+        return None
+
+
+class Restriction(dict):
+    """Restriction dict holding its restrict_key, built once on construction
+
+    Graphs keep their restrictions in one, it must not be modified afterwards.
     """
-    if group_len % 2 == 0:
-        start = ((int(group_len / 2) - 1) * width * -1) - (width / 2.0)
-    else:
-        start = int((group_len / 2)) * width * -1
 
-    temp = []
-    offset = start
-    for _ in range(0, group_len):
-        temp.append(offset)
-        offset += width
-    return temp
+    __slots__ = ("key",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key = _items_key(self)
 
-def axis_kwargs(ax, kwargs):
-    if "title" in kwargs:
-        ax.set_title(kwargs.get("title"))
 
+def restrict_key(restrict_dict: Dict):
+    """Hashable key for a restriction dict
 
-def filter(metrics: List, restrict_dict: Dict):
-    """Filter a list of metrics given a restriction dict"""
-    final_metric = []
-    for metric in metrics:
-        if all(item in metric.get_stats().items() for item in restrict_dict.items()):
-            final_metric.append(metric)
-    return final_metric
+    None when its values are unhashable or caching by restriction is disabled.
+    """
+    if not _CACHE_RESTRICTED:
+        return None
+    if isinstance(restrict_dict, Restriction):
+        return restrict_dict.key
+    return _items_key(restrict_dict)
+
+
+def filter(soa: Dict, restrict_dict: Dict):
+    """Boolean mask of the metrics within a columnar view matching a restriction dict
+
+    Restrictions on keys the execution does not have are ignored.
+    Callers needing the metric objects themselves can use np.flatnonzero on the mask.
+    Masks are cached on the view and shared, so they are read only.
+    """
+    key = restrict_key(restrict_dict)
+    mask = soa["_masks"].get(key) if key is not None else None
+    if mask is not None:
+        return mask
+
+    mask = np.ones(soa["_n"], dtype=bool)
+    for name, val in restrict_dict.items():
+        if name in soa["_restrict"]:
+            mask &= soa["_restrict"][name] == val
+        elif name in soa["_stats"]:
+            mask &= soa["_stats"][name] == val
+    mask.flags.writeable = False
+    if key is not None:
+        soa["_masks"][key] = mask
+    return mask
@@ -1,8 +1,11 @@
+import os
 import re
 from typing import List, Dict
 
 from .globals import _sb_executions
 
+_LINE_ONLY = ("\\A", "\\Z", "(?<=", "(?<!")
+
 
 class MatchParser:
     """MatchParser class takes regex matches and on success run a given function"""
@@ -28,34 +31,79 @@ class MatchParser:
         """
         self.match_rules = match_rules
         self.execution = None
-
-    def _match(self, line: str, obj: Dict):
-        for cand, tup in self.match_rules.items():
-            if re.search(cand, line):
-                output = tup[1](line)
-                if len(output) != len(tup[0]):
+        self._compiled = [
+            (re.compile(cand), names, func)
+            for cand, (names, func) in match_rules.items()
+        ]
+        # The rules are fixed, so their output names are gathered once
+        self._fields = [name for _, names, _ in self._compiled for name in names]
+        self._field_set = frozenset(self._fields)
+
+        # Fuse every rule into one alternation so lines matching no rule are rejected
+        # in a single scan. Rules with groups are left out as fusing them would
+        # renumber their groups.
+        self._any = None
+        if all(pattern.groups == 0 for pattern, _, _ in self._compiled):
+            try:
+                self._any = re.compile(
+                    "|".join("(?:{})".format(p.pattern) for p, _, _ in self._compiled),
+                    re.MULTILINE,
+                )
+            except re.error:
+                pass
+
+        # Scanning the whole text at once lets anchors on the text and lookbehinds see
+        # past the line, so rules using them are only ever run a line at a time
+        self._scan_text = self._any is not None and not any(
+            token in pattern.pattern
+            for pattern, _, _ in self._compiled
+            for token in _LINE_ONLY
+        )
+
+    def _match(self, line: str, obj: Dict, checked: bool = False):
+        if not checked and self._any is not None and not self._any.search(line):
+            return
+
+        for pattern, names, func in self._compiled:
+            if pattern.search(line):
+                output = func(line)
+                if len(output) != len(names):
                     raise Exception(
                         "Function provided outputed {} values, expected {}".format(
-                            len(output), len(tup[0])
+                            len(output), len(names)
                         )
                     )
-                for match in zip(tup[0], output):
-                    obj[match[0]] = match[1]
+                obj.update(zip(names, output))
+
+    def _match_text(self, text: str, obj: Dict):
+        # Search the whole text with the fused rules and only hand the lines they
+        # land on to _match, resuming from the following line each time
+        pos = 0
+        while pos < len(text):
+            found = self._any.search(text, pos)
+            if not found or (found.start() == len(text) and text.endswith("\n")):
+                break
+            start = text.rfind("\n", 0, found.start()) + 1
+            pos = text.find("\n", found.start()) + 1 or len(text)
+            self._match(text[start:pos], obj, checked=True)
 
     def param_exists(self, name: str) -> bool:
         """Check if a param exists as an output of the parser"""
-        return any([name in varfunc[0] for varfunc in self.match_rules.values()])
+        return name in self._field_set
 
     def fields(self) -> List[str]:
         """Retrieve all named fields within the parser"""
-        return [item for sublist in self.match_rules.values() for item in sublist[0]]
+        return list(self._fields)
 
     def parse(self, path, bench_args, backend_args) -> List:
         """Parse the execution"""
         obj = {}
         with open(path, "r") as file:
-            for line in file:
-                self._match(line, obj)
+            if not self._scan_text:
+                for line in file:
+                    self._match(line, obj)
+            else:
+                self._match_text(file.read(), obj)
             # Make sure to put constants in the data as well
             for key, val in bench_args.items():
                 obj[key] = val
@@ -66,7 +114,7 @@ class MatchParser:
 
             # We hold field names within our filename as well, things like iteration number
             # and var variable value
-            obj["_execution_name"] = path.split("/")[-1].split("_")[0]
+            obj["_execution_name"] = os.path.basename(path).split("_", 1)[0]
             execution = _sb_executions[obj["_execution_name"]]
             obj.update(execution.reverse_file_out(path))
 
@@ -117,7 +165,7 @@ class FileParser:
             for key, val in backend_args.items():
                 obj[key] = val
 
-        obj["_execution_name"] = path.split("/")[-1].split("_")[0]
+        obj["_execution_name"] = os.path.basename(path).split("_", 1)[0]
         execution = _sb_executions[obj["_execution_name"]]
         obj.update(execution.reverse_file_out(path))
 
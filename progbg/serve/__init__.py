@@ -1,11 +1,28 @@
 import os
 
+from functools import lru_cache
+
 from typing import Dict
-from flask import Flask, render_template, send_from_directory, abort
+from flask import Flask, render_template, send_from_directory, abort, request
 from progbg import Execution
 from progbg.graphing import *
 from pprint import pformat
 
+GRAPH_MAX_AGE = 3600
+"""Seconds browsers may reuse a graph image before revalidating it"""
+
+_DATA_TEMPLATES = {BarGraph: "bar_data.html", LineGraph: "line_data.html"}
+"""Template showing the data of each type of graph"""
+
+
+def _data_template(cls):
+    # Walking the mro starts at the class itself, so subclasses of a known graph
+    # use the template of their closest known base
+    return next(
+        (_DATA_TEMPLATES[base] for base in cls.__mro__ if base in _DATA_TEMPLATES),
+        None,
+    )
+
 
 def create_server(executions, graphs, figures, graphs_dir: str):
     app = Flask(__name__, instance_relative_config=True)
@@ -25,20 +42,47 @@ def create_server(executions, graphs, figures, graphs_dir: str):
     def home():
         return render_template("index.html", graphs=graphs, figures=figures)
 
-    @app.route("/data/<graph_index>")
+    @lru_cache(maxsize=256)
+    def render_graph(index, graph_id):
+        # Graph data is fixed once the plan has run, so each page only needs
+        # rendering once. The graph's id is part of the key so a replaced
+        # graph object is rendered afresh.
+        graph = graphs[index]
+        template = _data_template(type(graph))
+        if template is None:
+            return None
+        return render_template(template, name=str(index), graph=graph)
+
+    @app.route("/data/<int:graph_index>")
     def data(graph_index=None):
-        graph = graphs[int(graph_index)]
-        print(graph)
-        if isinstance(graph, BarGraph):
-            # Its a bar graph
-            return render_template("bar_data.html", name=graph_index, graph=graph)
-        elif isinstance(graph, LineGraph):
-            return render_template("line_data.html", name=graph_index, graph=graph)
+        if graph_index >= len(graphs):
+            abort(404, description="No such graph")
+        page = render_graph(graph_index, id(graphs[graph_index]))
+        if page is None:
+            abort(404, description="Not implemented Graph")
+        return page
 
-        abort(404, description="Not implemented Graph")
+    @app.template_filter("version")
+    def graph_version(filename):
+        # Graph urls carry the file's mtime so regenerated graphs bypass the
+        # browser cache
+        try:
+            return os.stat(os.path.join(graphs_dir, filename)).st_mtime_ns
+        except OSError:
+            return 0
 
     @app.route("/graphs/<path:filename>")
     def graphs_static(filename):
-        return send_from_directory(graphs_dir, filename)
+        return send_from_directory(
+            graphs_dir, filename, max_age=GRAPH_MAX_AGE, conditional=True
+        )
+
+    @app.after_request
+    def graphs_cache(response):
+        # Errors are not cached, a missing graph may be generated later
+        if request.path.startswith("/graphs/") and response.status_code in (200, 304):
+            control = "public, max-age={}, must-revalidate".format(GRAPH_MAX_AGE)
+            response.headers["Cache-Control"] = control
+        return response
 
     return app
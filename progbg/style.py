@@ -11,6 +11,8 @@ to change the style to the selected style.
 For example a BarGraph could be given the style "hatch_a", or "color_b". Currently I do
 not support hatches and colors cause I find this distracts readers of the data, but open to discussion.
 """
+from functools import lru_cache
+
 import matplotlib as mpl
 from cycler import cycler, Cycler
 
@@ -79,6 +81,23 @@ def get_style_cycler():
     return progbg_default_style["axes.prop_cycle"]
 
 
+@lru_cache(maxsize=32)
+def _build_cycler(style_name):
+    vals = style_name.split("_")
+    if vals[0] == "hatch":
+        style_list = _hatch_styles[vals[1]]
+        return cycler(hatch=style_list)
+    elif vals[0] == "line":
+        style_list = _line_styles[vals[1]]
+        return cycler(
+            color=["#000000"] * len(style_list),
+            linestyle=style_list,
+            linewidth=[1] * len(style_list),
+        )
+
+    return cycler(color=_color_styles[vals[1]])
+
+
 def set_style(style_name):
     """Get a style cycler
 
@@ -90,21 +109,10 @@ def set_style(style_name):
     Return
         Cycler object with either hatch or color set
     """
+    global _current_style
     _current_style = style_name
     if not isinstance(style_name, Cycler):
-        vals = style_name.split("_")
-        if vals[0] == "hatch":
-            style_list = _hatch_styles[vals[1]]
-            c = cycler(hatch=style_list)
-        elif vals[0] == "line":
-            style_list = _line_styles[vals[1]]
-            c = cycler(
-                color=["#000000"] * len(style_list),
-                linestyle=style_list,
-                linewidth=[1] * len(style_list),
-            )
-        else:
-            c = cycler(color=_color_styles[vals[1]])
+        c = _build_cycler(style_name)
     else:
         c = style_name
 
@@ -1,9 +1,10 @@
 """Utility function and classes used throughout progbg"""
 import itertools
+from functools import lru_cache
 import sys
 import os
 from pprint import pformat
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator
 
 
 import numpy as np
@@ -13,6 +14,45 @@ from .globals import _sb_rnames
 
 REQUIRED = object()
 
+_sb_reserved = frozenset(_sb_rnames)
+
+
+_INITIAL_SAMPLES = 16
+
+_STD_TAKES_MEAN = int(np.__version__.split(".")[0]) >= 2
+
+# Below this variance relative to the squared mean, the sum of squares formula
+# loses too many digits to cancellation
+_CANCELLATION = 1e-6
+
+
+def _mean_std(arr):
+    """Mean and standard deviation of a 1-D float64 array of samples"""
+    # Both moments come from one sum and one dot product, neither allocates a
+    # deviation array the size of the samples
+    mean = arr.sum() / arr.size
+    var = np.dot(arr, arr) / arr.size - mean * mean
+    if var > _CANCELLATION * mean * mean:
+        return mean, np.sqrt(var)
+
+    # Nearly constant samples, take the slower but exact two pass route
+    if _STD_TAKES_MEAN:
+        return mean, arr.std(mean=np.reshape(mean, (1,)))
+    dev = arr - mean
+    return mean, np.sqrt(np.dot(dev, dev) / arr.size)
+
+
+def _mean_std_rows(block):
+    """Mean and standard deviation of each row of a 2-D float64 array, see _mean_std"""
+    n = block.shape[1]
+    means = block.sum(axis=1) / n
+    var = np.einsum("ij,ij->i", block, block) / n - means * means
+    exact = var <= _CANCELLATION * means * means
+    if exact.any():
+        dev = block[exact] - means[exact, None]
+        var[exact] = np.einsum("ij,ij->i", dev, dev) / n
+    return means, np.sqrt(var)
+
 
 class Metrics:
     """Metrics collection object
@@ -21,11 +61,35 @@ class Metrics:
     must be kept. The main functio that should be used by users is the add_metric
     function, which simply appends data points to a list to be used to calculate
     means and standard deviation later
+
+    Data points of each key are kept in a float64 buffer that doubles in size when
+    full, with the number of points used kept alongside it.
     """
 
+    __slots__ = ("_vars", "_lens", "_consts", "_stats_cache")
+
     def __init__(self):
         self._vars = dict()
+        self._lens = dict()
         self._consts = dict()
+        self._stats_cache = None
+
+    def _reserve(self, key, count):
+        """Buffer of key with room for count more data points"""
+        n = self._lens.get(key, 0)
+        buf = self._vars.get(key)
+        if buf is None:
+            buf = np.empty(max(_INITIAL_SAMPLES, count), dtype=np.float64)
+            self._vars[key] = buf
+            self._lens[key] = 0
+        elif n + count > buf.size:
+            grown = np.empty(max(buf.size * 2, n + count), dtype=np.float64)
+            grown[:n] = buf[:n]
+            buf = self._vars[key] = grown
+        return buf, n
+
+    def _samples(self, key):
+        return self._vars[key][: self._lens[key]]
 
     def add_metric(self, key, val):
         """Add a data point to a metric key
@@ -44,29 +108,53 @@ class Metrics:
             >>>         val = find_specific_value(mydata)
             >>>         metrics.add_metric('my-stored-val', val)
         """
-        if key not in self._vars:
-            self._vars[key] = [val]
-        else:
-            self._vars[key].append(val)
+        buf, n = self._reserve(key, 1)
+        buf[n] = val
+        self._lens[key] = n + 1
+        self._stats_cache = None
 
     def to_file(self, path):
-        stats = self.get_stats()
-        with open(path, "w") as f:
-            for k, val in stats.items():
-                f.write("{}={}\n".format(k, val))
+        dump_obj(path, self.get_stats())
+
+    def add_metrics(self, key, vals=None):
+        """Add many data points at once
+
+        Args:
+            key (str, dict): Key to add values to, or a dictionary of keys to
+                the value (or values) to add to each
+            vals (list, optional): Values to append when key is a str
 
-    def add_metrics(self, key, vals):
-        for v in vals:
-            self.add_metric(key, v)
+        Example:
+            >>> metrics.add_metrics("latency", [10, 12, 11])
+            >>> metrics.add_metrics({"low": 10, "mid": 500, "high": 900})
+        """
+        if isinstance(key, dict):
+            for name, values in key.items():
+                self._extend(name, values)
+        elif vals is None:
+            raise TypeError("add_metrics needs values for key '{}'".format(key))
+        else:
+            self._extend(key, vals)
+        self._stats_cache = None
+
+    def _extend(self, key, vals):
+        vals = np.asarray(vals, dtype=np.float64).ravel()
+        if vals.size == 0:
+            # Like adding each value in turn, an empty batch leaves the metric untouched
+            return
+        buf, n = self._reserve(key, vals.size)
+        buf[n : n + vals.size] = vals
+        self._lens[key] = n + vals.size
 
     def stat(self, key):
         obj = self.get_stats()
         return obj[key]
 
     def __getitem__(self, key):
-        obj = self.get_stats()
+        # Samples and constants are read directly, there is no need to reduce.
+        # Samples are copied out of the buffer, which is reused as it grows.
         if key in self._vars:
-            return self._vars[key]
+            return self._samples(key).copy()
 
         return self._consts[key]
 
@@ -81,13 +169,10 @@ class Metrics:
             val (obj): Value of this constant
         """
         self._consts[key] = val
+        self._stats_cache = None
 
     def _combine(self, other: Dict):
-        for key, val in other._vars.items():
-            if key in self._vars:
-                self._vars[key].append(val)
-            else:
-                self._vars[key] = val
+        self.add_metrics({key: other._samples(key) for key in other._vars})
 
     def get_stats(self):
         """Returns the metrics object
@@ -101,13 +186,34 @@ class Metrics:
         at key "my-metrics_std".  This allows users to also manually set standard deviation
         of objects if needed. For example when using then `plan_parse` style executions.
 
+        The returned dictionary is cached until the metrics object is next modified, so
+        callers must treat it as read only.
+
         Returns:
             dict
         """
+        if self._stats_cache is None:
+            self._stats_cache = self._compute_stats()
+        return self._stats_cache
+
+    def _compute_stats(self):
+        # Keys holding as many samples as each other (usually added together by
+        # the same parser) are reduced together as one block
+        groups = dict()
+        for key in self._vars:
+            groups.setdefault(self._lens[key], []).append(key)
+
+        stats = dict()
+        for keys in groups.values():
+            if len(keys) == 1:
+                stats[keys[0]] = _mean_std(self._samples(keys[0]))
+            else:
+                means, stds = _mean_std_rows(np.stack([self._samples(k) for k in keys]))
+                stats.update(zip(keys, zip(means, stds)))
+
         obj = dict()
-        for key, val in self._vars.items():
-            obj[key] = np.mean(val)
-            obj[key + "_std"] = np.std(val)
+        for key in self._vars:
+            obj[key], obj[key + "_std"] = stats[key]
         for key, val in self._consts.items():
             obj[key] = val
 
@@ -119,13 +225,14 @@ class Metrics:
 
 
 def normalize(group_list, index_to):
-    normal = group_list[index_to]
-    final_list = []
-    for group in group_list:
-        stddev = group[1] / group[0]
-        newval = group[0] / normal[0]
-        final_list.append((newval, stddev * newval))
-    return final_list
+    groups = np.asarray(group_list, dtype=np.float64).reshape(-1, 2)
+    # Zero means would divide by zero, their normalized values are set to 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        newvals = groups[:, 0] / groups[index_to, 0]
+        stddevs = groups[:, 1] / groups[:, 0] * newvals
+    newvals = np.nan_to_num(newvals, nan=0.0, posinf=0.0, neginf=0.0)
+    stddevs = np.nan_to_num(stddevs, nan=0.0, posinf=0.0, neginf=0.0)
+    return list(zip(newvals.tolist(), stddevs.tolist()))
 
 
 def silence_print():
@@ -145,22 +252,21 @@ def error(strn: str):
 def dump_obj(file: str, obj: Dict):
     """Dump dictionary to file key=val"""
     with open(file, "w") as ofile:
-        for key, val in obj.items():
-            line = "{}={}\n".format(key, val)
-            ofile.write(line)
+        ofile.write("".join("{}={}\n".format(key, val) for key, val in obj.items()))
 
 
 def retrieve_obj(file: str) -> Dict:
     """Retrieve dictionary from file key=val"""
     obj = {}
     with open(file, "r") as ofile:
-        for line in ofile.readlines():
-            vals = line.strip().split("=")
-            try:
-                obj[vals[0]] = vals[1]
-            except:
-                print("Issue with file: {}".format(file))
-                exit(0)
+        for line in ofile.read().splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            key, sep, val = line.partition("=")
+            if not sep:
+                raise ValueError("Issue with file: {}".format(file))
+            obj[key] = val
     return obj
 
 
@@ -176,22 +282,26 @@ class Variables:
         var: A tuple of an argument name and some iterable object
     """
 
+    __slots__ = ("consts", "var", "_y_names", "_all_names")
+
     def __init__(self, consts: Dict = None, var: List[Tuple[str, List]] = None) -> None:
         if len(var):
-            if any([i in consts for i in _sb_rnames]) or (var[0] in _sb_rnames):
+            names = [vals[0] for vals in var]
+            if not _sb_reserved.isdisjoint(itertools.chain(consts, names)):
                 raise Exception(
                     "Cannot use a reserved name for a variable {}".format(
                         pformat(_sb_rnames)
                     )
                 )
-            for vals in var:
-                if vals[0] in consts:
-                    raise Exception(
-                        "Name defined as constant and varying: {}".format(vals[0])
-                    )
+            both = consts.keys() & names
+            if both:
+                name = next(n for n in names if n in both)
+                raise Exception("Name defined as constant and varying: {}".format(name))
 
         self.consts = consts
         self.var = var
+        self._y_names = tuple(x[0] for x in var)
+        self._all_names = frozenset(consts) | frozenset(self._y_names)
 
     def produce_args(self) -> List[Dict]:
         """Produces a list of arguments given the consts and vars
@@ -212,77 +322,103 @@ class Variables:
                 ...
                 { other = 1, x = 2, test = 4},
         """
+        return list(self.iter_args())
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_args()
+
+    def iter_args(self) -> Iterator[Dict]:
+        """Lazily produce the arguments of produce_args one at a time
+
+        Only the current permutation is held in memory, for sweeps that are
+        iterated a single time.
+        """
         if not len(self.var):
-            return [dict(self.consts)]
+            yield dict(self.consts)
+            return
 
         key_names, ranges = zip(*self.var)
-        args = []
         for perm in itertools.product(*ranges):
             run_vars = dict(self.consts)
-            for i, k in enumerate(key_names):
-                run_vars[k] = perm[i]
-            args.append(run_vars)
-
-        return args
+            run_vars.update(zip(key_names, perm))
+            yield run_vars
 
     def param_exists(self, name: str) -> bool:
         """Checks if a variable is defined either as a constant or a varrying variable"""
-        return (name in self.consts) or any([name == x[0] for x in self.var])
+        return name in self._all_names
 
-    def y_names(self) -> List[str]:
+    def y_names(self) -> Tuple[str]:
         """Returns the names of varrying or responding variables"""
-        return [x[0] for x in self.var]
+        return self._y_names
 
     def const_names(self) -> List[str]:
         """Returns names of constants"""
         return self.consts.keys()
 
     def __repr__(self) -> str:
-        return pformat(vars(self), width=30)
+        return pformat(dict(consts=self.consts, var=self.var), width=30)
+
+
+_USER_TO_OUT = str.maketrans("/", "-")
+_OUT_TO_USER = str.maketrans("-", "/")
 
 
 class Backend:
+    __slots__ = (
+        "backends",
+        "runtime_variables",
+        "path_sql",
+        "path_out",
+        "path_user",
+        "_aliases",
+    )
+
     def __init__(self, path, variables):
         self.backends = path.split("/")
         self.runtime_variables = variables
+        # Backends never change after construction, so every form of the path is
+        # built once here rather than on each access or comparison
+        self.path_sql = "_b_".join(self.backends)
+        self.path_out = "-".join(self.backends)
+        self.path_user = "/".join(self.backends)
+        self._aliases = frozenset((self.path_sql, self.path_out, self.path_user))
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def user_to_sql(path):
-        return "_b_".join(path.split("/"))
+        return path.replace("/", "_b_")
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def user_to_out(path):
-        return "-".join(path.split("/"))
+        return path.translate(_USER_TO_OUT)
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def out_to_user(path):
-        return "/".join(path.split("-"))
+        return path.translate(_OUT_TO_USER)
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def out_to_sql(path):
-        return "_b_".join(path.split("-"))
-
-    @property
-    def path_sql(self):
-        return "_b_".join(self.backends)
-
-    @property
-    def path_user(self):
-        return "/".join(self.backends)
-
-    @property
-    def path_out(self):
-        return "-".join(self.backends)
+        return path.replace("-", "_b_")
 
     def __eq__(self, path):
-        return (
-            (self.path_sql == path)
-            or (self.path_out == path)
-            or (self.path_user == path)
-        )
+        # A backend equals any of the sql, out and user forms of its path, which do
+        # not hash alike, so backends are unhashable and cannot key sets or dicts
+        if isinstance(path, Backend):
+            return self._aliases == path._aliases
+        if isinstance(path, str):
+            return path in self._aliases
+        return NotImplemented
+
+    __hash__ = None
 
 
 class ExecutionStub:
+    # Graphs cache their columnar view and loaded objects on executions
+    __slots__ = ("_cached", "_soa")
+
     def __init__(self, **kwargs):
         metric = Metrics()
         for k, v in kwargs.items():
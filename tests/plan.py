@@ -2,7 +2,8 @@ import progbg as sb
 import progbg.graphing as graph
 
 import time
-from random import randint
+import numpy as np
+from random import randrange
 from cycler import cycler
 
 
@@ -44,28 +45,27 @@ class Wrk:
     @staticmethod
     def run(backend, outfile, test=5, x=10):
         # DO STUFF
-        min = str(randint(1, 100))
-        mid = str(randint(400, 600))
-        max = str(randint(700, 1000))
-        vals = "{} {}\n".format(test, x)
-        strn = "Latency  {}  {}  {}".format(min, mid, max)
-        with open(outfile, "w") as out:
-            out.write(vals)
-            out.write(strn)
+        low, mid, high = randrange(1, 101), randrange(400, 601), randrange(700, 1001)
+        out_text = f"{test} {x}\nLatency  {low}  {mid}  {high}"
+        # Binary mode writes the encoded payload without a text wrapper
+        with open(outfile, "wb") as out:
+            out.write(out_text.encode())
 
 
 def func(line):
-    return [x.strip() for x in line.split()[1:]]
+    # split() with no separator already drops surrounding whitespace
+    return line.split()[1:]
+
+
+LATENCY = r"Latency\s+(\d+)\s+(\d+)\s+(\d+)"
 
 
 def file_func(metrics, path):
-    with open(path, "r") as file:
-        for line in file.readlines():
-            if "Latency" in line:
-                vals = [int(x.strip()) for x in line.split()[1:]]
-                metrics.add_metric("low", vals[0])
-                metrics.add_metric("mid", vals[1])
-                metrics.add_metric("high", vals[2])
+    # Pull every Latency line out of the file in one pass and add each column at once
+    vals = np.fromregex(
+        path, LATENCY, dtype=[("low", "i8"), ("mid", "i8"), ("high", "i8")]
+    )
+    metrics.add_metrics({name: vals[name] for name in vals.dtype.names})
 
 
 def text_parser(metrics, path):